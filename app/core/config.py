@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pathlib import Path
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -10,15 +11,20 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     LLM_MODEL: str
     LLM_TEMPERATURE: float
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_SUMMARY_TIMEOUT: float = 120.0
 
     LANGFUSE_PUBLIC_KEY: str
     LANGFUSE_SECRET_KEY: str
     LANGFUSE_HOST: str
     LANGFUSE_TRACING_ENABLED: bool
+    LANGFUSE_TRUNCATE_PROMPTS: bool = False
 
     QDRANT_URL: str
     QDRANT_API_KEY: str
     QDRANT_COLLECTION: str
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT: int = 5
     EMBEDDING_DIM: int
     APP_HOST: str
     APP_PORT: int
@@ -32,11 +38,25 @@ class Settings(BaseSettings):
     WS_PING_TIMEOUT: float = 60.0
     INGEST_HTTP_TIMEOUT: float = 60.0
 
+    REDIS_URL: str | None = None
+
+    INTENT_FAST_PATH: bool = True
+    SEMANTIC_INTENT_CACHE: bool = False
+    SEMANTIC_INTENT_CACHE_COLLECTION: str = "news_intent_cache"
+    SEMANTIC_INTENT_CACHE_THRESHOLD: float = 0.95
+
     model_config = SettingsConfigDict(
         env_file=str(BASE_DIR / ".env"),
         env_file_encoding="utf-8",
-        extra="ignore"
+        extra="ignore",
+        frozen=True,
     )
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the settings once per process; env and .env are read only here."""
+    return Settings()
+
+
+settings = get_settings()
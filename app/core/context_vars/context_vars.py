@@ -1,23 +1,41 @@
 from __future__ import annotations
-import uuid
+import os
 from contextvars import ContextVar
+from dataclasses import dataclass
 from app.schema.common import Languages
 
 
+@dataclass(frozen=True, slots=True)
+class FlowContext:
+    """Per-connection flow state, set once when a connection is opened."""
+
+    conversation_id: str = ""
+    flow_name: str = "default"
+    locale: str = Languages.EN.value
+
+
+@dataclass(frozen=True, slots=True)
+class MessageContext:
+    """Per-message identifiers, set once for every inbound message."""
+
+    user_message_id: str = ""
+    log_id: str = ""
+    trace_id: str = ""
+
+
 class FlowContextManager:
     """
     Class wrapper around contextvars so you can call:
     FlowContextManager.init_for_connection(...)
     FlowContextManager.init_for_message()
     FlowContextManager.get_conversation_id()
+
+    Connection and message state each live in a single ContextVar holding a
+    frozen dataclass, so every init is one ContextVar write.
     """
 
-    _conversation_id: ContextVar[str] = ContextVar("conversation_id", default="")
-    _user_message_id: ContextVar[str] = ContextVar("user_message_id", default="")
-    _log_id: ContextVar[str] = ContextVar("log_id", default="")
-    _trace_id: ContextVar[str] = ContextVar("trace_id", default="")
-    _flow_name: ContextVar[str] = ContextVar("flow_name", default="default")
-    _locale: ContextVar[str] = ContextVar("locale", default=Languages.EN.value)
+    _flow: ContextVar[FlowContext] = ContextVar("flow", default=FlowContext())
+    _message: ContextVar[MessageContext] = ContextVar("message", default=MessageContext())
 
     @classmethod
     def init_for_connection(
@@ -27,26 +45,43 @@ class FlowContextManager:
         flow_name: str = "websocket-chat",
         locale: str = Languages.EN.value,
     ) -> None:
-        conv_id = conversation_id or str(uuid.uuid4())
-        cls._conversation_id.set(conv_id)
-        cls._flow_name.set(flow_name)
-        cls._locale.set(locale)
+        cls._flow.set(
+            FlowContext(
+                conversation_id=conversation_id or os.urandom(16).hex(),
+                flow_name=flow_name,
+                locale=locale,
+            )
+        )
 
     @classmethod
     def init_for_message(cls) -> None:
-        cls._user_message_id.set(str(uuid.uuid4()))
-        cls._log_id.set(str(uuid.uuid4()))
-        cls._trace_id.set(str(uuid.uuid4()))
+        # one urandom call for all three 128-bit ids
+        ids = os.urandom(48).hex()
+        cls._message.set(
+            MessageContext(
+                user_message_id=ids[:32],
+                log_id=ids[32:64],
+                trace_id=ids[64:],
+            )
+        )
 
     # getters
     @classmethod
     def get_conversation_id(cls) -> str:
-        return cls._conversation_id.get()
+        return cls._flow.get().conversation_id
 
     @classmethod
     def get_user_message_id(cls) -> str:
-        return cls._user_message_id.get()
+        return cls._message.get().user_message_id
+
+    @classmethod
+    def get_trace_id(cls) -> str:
+        return cls._message.get().trace_id
+
+    @classmethod
+    def get_message_context(cls) -> MessageContext:
+        return cls._message.get()
 
     @classmethod
     def get_locale(cls) -> str:
-        return cls._locale.get()
+        return cls._flow.get().locale
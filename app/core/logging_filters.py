@@ -2,6 +2,10 @@ import logging
 
 from app.core.context_vars.context_vars import FlowContextManager
 
+# bound once; both context vars have defaults so .get() never raises
+_get_flow = FlowContextManager._flow.get
+_get_message = FlowContextManager._message.get
+
 
 class LangfuseContextFilter(logging.Filter):
     """
@@ -9,15 +13,6 @@ class LangfuseContextFilter(logging.Filter):
     """
 
     def filter(self, record: logging.LogRecord) -> bool:
-        try:
-            record.langfuse_trace_id = FlowContextManager.get_conversation_id() or "-"
-        except Exception:
-            record.langfuse_trace_id = "-"
-
-        try:
-            record.langfuse_session_id = FlowContextManager.get_user_message_id() or "-"
-        except Exception:
-            record.langfuse_session_id = "-"
-
+        record.langfuse_trace_id = _get_flow().conversation_id or "-"
+        record.langfuse_session_id = _get_message().user_message_id or "-"
         return True
-
@@ -1,15 +1,22 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Set
 
-from bs4 import BeautifulSoup, Comment
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
-from newspaper import Article
 
 from app.core.config import settings
+from app.services.llm_provider import EmbeddingsProvider
+
+# newspaper (NLTK, lxml), bs4 and the Qdrant stack are imported where they are
+# used, so importing this module at app startup stays cheap
+if TYPE_CHECKING:
+    from langchain_qdrant import QdrantVectorStore
+
+LOGGER = logging.getLogger(__name__)
 
 JUNK_TAGS = ("header", "footer", "nav", "aside", "form", "script", "style")
 JUNK_HINTS = [
@@ -21,22 +28,67 @@ MOBILE_HINTS = [
     "mobile", "mobi", "m-only", "mobile-only", "hidden-md-up",
 ]
 
+# rough token budget per embeddings request (~4 characters per token)
+EMBED_BATCH_TOKENS = 8000
+EMBED_MAX_WORKERS = 8
+_EMBED_EXECUTOR = ThreadPoolExecutor(max_workers=EMBED_MAX_WORKERS, thread_name_prefix="embed")
+
+# single-pass, case-insensitive substring matcher over every junk/mobile hint
+_HINTS = frozenset(h.lower() for h in JUNK_HINTS + MOBILE_HINTS)
+_HINT_RE = re.compile("|".join(map(re.escape, sorted(_HINTS))), re.IGNORECASE)
+
+_vectorstore: Optional[QdrantVectorStore] = None
+_vectorstore_lock = threading.Lock()
+
+
 def ensure_vectorstore() -> QdrantVectorStore:
-    embeddings = OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY)
+    """
+    Return the process-wide vector store, building it on first use.
+
+    The Qdrant client, embeddings client and collection check are created once
+    and reused by every ingest request.
+    """
+    global _vectorstore
+    if _vectorstore is not None:
+        return _vectorstore
+
+    with _vectorstore_lock:
+        if _vectorstore is None:
+            _vectorstore = _build_vectorstore()
+    return _vectorstore
+
+
+def reset_vectorstore() -> None:
+    """Close the process-wide store's client; the next `ensure_vectorstore` rebuilds it."""
+    global _vectorstore
+    with _vectorstore_lock:
+        vectorstore, _vectorstore = _vectorstore, None
+    if vectorstore is not None:
+        vectorstore.client.close()
+
+
+def _build_vectorstore() -> QdrantVectorStore:
+    from langchain_qdrant import QdrantVectorStore
+    from qdrant_client import QdrantClient
+    from qdrant_client.http.models import Distance, VectorParams
+
+    embeddings = EmbeddingsProvider.get()
 
     collection_name = settings.QDRANT_COLLECTION
 
     client = QdrantClient(
         url=settings.QDRANT_URL,
+        prefer_grpc=True,
+        grpc_port=settings.QDRANT_GRPC_PORT,
+        timeout=settings.QDRANT_TIMEOUT,
     )
 
-    try:
-        client.get_collection(collection_name)
-    except Exception:
+    # only a missing collection is created; connection errors propagate
+    if not client.collection_exists(collection_name):
         client.create_collection(
             collection_name=collection_name,
             vectors_config=VectorParams(
-                size=1536,
+                size=settings.EMBEDDING_DIM,
                 distance=Distance.COSINE,
             ),
         )
@@ -49,23 +101,59 @@ def ensure_vectorstore() -> QdrantVectorStore:
     return vectorstore
 
 
-def store_docs_serial(vectorstore: QdrantVectorStore, docs: List[Document]) -> None:
-    vectorstore.add_documents(docs)
+def store_docs_serial(vectorstore: QdrantVectorStore, docs: Iterable[Document]) -> None:
+    vectorstore.add_documents(list(docs))
 
 
-def store_docs_parallel(vectorstore: QdrantVectorStore, docs: List[Document], chunk_size: int = 10) -> None:
+def store_docs_parallel(
+    vectorstore: QdrantVectorStore,
+    docs: Iterable[Document],
+    max_batch_tokens: int = EMBED_BATCH_TOKENS,
+) -> None:
     """
-    Store documents in parallel chunks to speed up embedding+upload for large lists.
+    Store documents in parallel batches to speed up embedding+upload for large lists.
+
+    Batches are packed by approximate token count rather than document count, and
+    submitted to a shared process-wide executor as they are formed. At most
+    2 * EMBED_MAX_WORKERS batches are in flight, so `docs` can be any iterable
+    without being materialized up front.
     """
-    chunks = [docs[i:i + chunk_size] for i in range(0, len(docs), chunk_size)]
+    max_in_flight = EMBED_MAX_WORKERS * 2
+    pending: Set[Future] = set()
 
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = [executor.submit(vectorstore.add_documents, chunk) for chunk in chunks]
-        for fut in as_completed(futures):
+    try:
+        for batch in _token_batches(docs, max_batch_tokens):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    fut.result()
+            pending.add(_EMBED_EXECUTOR.submit(vectorstore.add_documents, batch))
+
+        done, pending = wait(pending)
+        for fut in done:
             fut.result()
-
-
-
+    except BaseException:
+        # don't report failure while queued batches keep writing in the background
+        for fut in pending:
+            fut.cancel()
+        wait(pending)
+        raise
+
+
+def _token_batches(docs: Iterable[Document], max_tokens: int) -> Iterator[List[Document]]:
+    """Greedily pack documents into batches of at most `max_tokens` approximate tokens."""
+    batch: List[Document] = []
+    batch_tokens = 0
+    for doc in docs:
+        tokens = max(1, len(doc.page_content) // 4)
+        if batch and batch_tokens + tokens > max_tokens:
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(doc)
+        batch_tokens += tokens
+    if batch:
+        yield batch
 
 
 def clean_downloaded_html(raw_html: str) -> str:
@@ -74,45 +162,21 @@ def clean_downloaded_html(raw_html: str) -> str:
     Removes nav/header/footer/mobile/junk blocks and returns a body-only HTML.
     Never raises on weird tags.
     """
-    soup = BeautifulSoup(raw_html or "", "html.parser")
+    from bs4 import BeautifulSoup, Comment
+
+    # keep class as the raw attribute string; we only substring-search it
+    soup = BeautifulSoup(raw_html or "", "lxml", multi_valued_attributes=None)
 
     # remove comments
     for c in soup.find_all(string=lambda t: isinstance(t, Comment)):
         c.extract()
 
-    # iterate over a snapshot so decompose() is safe
-    for el in list(soup.find_all(True)):
-        # be ultra defensive
+    # one pass: junk tags, junk/mobile class or id hints
+    for el in soup.find_all(_is_junk):
+        # be ultra defensive: a parent may already have taken this node with it
         try:
-            if el is None:
-                continue
-
-            # some nodes may not have attrs at all
-            if not hasattr(el, "name"):
-                continue
-
-            # 1) junk by tag
-            if el.name in JUNK_TAGS:
+            if not el.decomposed:
                 el.decompose()
-                continue
-
-            # safely get class/id
-            classes = el.get("class") or []
-            if isinstance(classes, str):
-                classes = [classes]
-            cls = " ".join(classes).lower()
-            el_id = (el.get("id") or "").lower()
-
-            # 2) junk by id/class
-            if any(h in cls or h in el_id for h in JUNK_HINTS):
-                el.decompose()
-                continue
-
-            # 3) mobile-only
-            if any(h in cls or h in el_id for h in MOBILE_HINTS):
-                el.decompose()
-                continue
-
         except Exception:
             continue
 
@@ -120,13 +184,24 @@ def clean_downloaded_html(raw_html: str) -> str:
     return str(body or soup)
 
 
+def _is_junk(el) -> bool:
+    if el.name in JUNK_TAGS:
+        return True
+
+    attr_blob = f"{el.get('class') or ''} {el.get('id') or ''}"
+    return _HINT_RE.search(attr_blob) is not None
+
+
 def extract_html(url: str):
     """Download, clean, and parse only the main desktop content."""
-    art = Article(url)
+    from newspaper import Article
+
+    art = Article(url, request_timeout=settings.INGEST_HTTP_TIMEOUT)
     art.download()
     cleaned_html = clean_downloaded_html(art.html)
     art.set_html(cleaned_html)
     art.parse()
-    print(art)
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug("Article parsed: %s", art)
 
     return {"html":art.html}
\ No newline at end of file
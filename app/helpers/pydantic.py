@@ -1,10 +1,9 @@
+import copy
 import inspect
+from functools import lru_cache
 from typing import Any
 
 import pydantic
-from langchain_classic.agents import AgentExecutor
-from langchain_classic.chains.llm import LLMChain
-from langchain_core.runnables import RunnableBinding
 from openai import NOT_GIVEN
 
 from typing_extensions import TypeGuard
@@ -14,6 +13,14 @@ def to_strict_json_schema(
 ) -> dict[str, Any]:
     """NOTE: Similer to the function from OpenAI Library to convert basemodel to json schema"""
 
+    # models are fixed at runtime; hand out a copy so callers can't corrupt the cache
+    return copy.deepcopy(_cached_strict_json_schema(model))
+
+
+@lru_cache(maxsize=128)
+def _cached_strict_json_schema(
+    model: type[pydantic.BaseModel] | pydantic.TypeAdapter[Any],
+) -> dict[str, Any]:
     if inspect.isclass(model) and is_basemodel_type(model):
         schema = model.model_json_schema()
     elif isinstance(model, pydantic.TypeAdapter):
@@ -118,7 +125,7 @@ def _ensure_strict_json_schema(
     # so we unravel the ref
     # `{"type": "string", "description": "my description"}`
     ref = json_schema.get("$ref")
-    if ref and has_more_than_n_keys(json_schema, 1):
+    if ref and len(json_schema) > 1:
         assert isinstance(ref, str), f"Received non-string $ref - {ref}"
 
         resolved = resolve_ref(root=root, ref=ref)
@@ -163,62 +170,11 @@ def is_dict(obj: object) -> TypeGuard[dict[str, object]]:
 def is_list(obj: object) -> TypeGuard[list[object]]:
     return isinstance(obj, list)
 
-def has_more_than_n_keys(obj: dict[str, object], n: int) -> bool:
-    i = 0
-    for _ in obj.keys():
-        i += 1
-        if i > n:
-            return True
-    return False
-def _ensure_llm_and_extra_body(chain):
-    """
-    Get the actual LLM object from whatever was passed (LLMChain, RunnableBinding,
-    AgentExecutor) and make sure `extra_body` is a dict.
-    Returns (llm, extra_body_dict).
+def forbid_extra(schema: dict[str, Any]) -> dict[str, Any]:
     """
-    llm = None
-
-    # 1) plain LLMChain
-    if isinstance(chain, LLMChain):
-        llm = chain.llm
-
-    # 2) AgentExecutor
-    elif isinstance(chain, AgentExecutor):
-        # adjust if your agent shape is different
-        llm = chain.agent.runnable.middle[1].bound
-
-    # 3) RunnableBinding (when you did .with_config(...))
-    elif isinstance(chain, RunnableBinding):
-        llm = chain.llm
-
-    else:
-        raise TypeError(f"Cannot extract LLM from chain of type {type(chain)}")
-
-    # now guarantee extra_body is a dict
-    extra_body = getattr(llm, "extra_body", None)
-    if extra_body is None:
-        extra_body = {}
-        setattr(llm, "extra_body", extra_body)
-
-    return llm, extra_body
+    Apply the strict-mode normalization to a raw JSON Schema dict.
 
-
-def forbid_extra(schema: Any) -> Any:
-    """
-    Recursively walk a JSON Schema and, for every object, set
-    additionalProperties = False if it's not present.
+    Every object gets additionalProperties = False in the same walk that
+    `to_strict_json_schema` performs, so no second traversal is needed.
     """
-    if isinstance(schema, dict):
-        # if this is an object, force additionalProperties: false
-        if schema.get("type") == "object":
-            schema.setdefault("additionalProperties", False)
-
-        # recurse into dict values
-        for key, value in schema.items():
-            schema[key] = forbid_extra(value)
-
-    elif isinstance(schema, list):
-        # recurse into list items
-        return [forbid_extra(item) for item in schema]
-
-    return schema
\ No newline at end of file
+    return _ensure_strict_json_schema(schema, path=(), root=schema)
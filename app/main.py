@@ -1,15 +1,41 @@
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 
+from app.core.config import settings
 from app.core.logging_config import setup_logging
+from app.helpers.document_store import ensure_vectorstore, reset_vectorstore
 from app.routers import router as api_router
+from app.routers.chat import aclose as aclose_chat
+from app.services.llm_provider import EmbeddingsProvider, LLMProvider
 
 _logging_config_path = os.getenv("APP_LOGGING_CONFIG")
 setup_logging(Path(_logging_config_path)) if _logging_config_path else setup_logging()
 
-app = FastAPI(title="AI Service")
+LOGGER = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    try:
+        await asyncio.to_thread(ensure_vectorstore)
+    except Exception as exc:
+        # keep the app up; the store is built lazily on the first ingest instead
+        LOGGER.warning("Vector store warm-up failed: %s", exc)
+    yield
+    # close everything that holds a pooled client, so a restarted lifespan
+    # (e.g. a second TestClient in one process) builds fresh ones
+    await aclose_chat()
+    await asyncio.to_thread(reset_vectorstore)
+    await LLMProvider.aclose()
+    await EmbeddingsProvider.aclose()
+
+
+app = FastAPI(title="AI Service", lifespan=lifespan)
 app.include_router(api_router)
 
 
@@ -20,5 +46,7 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
-    )
\ No newline at end of file
+        reload=True,
+        ws_ping_interval=settings.WS_PING_INTERVAL,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT,
+    )
@@ -1,5 +1,7 @@
+import asyncio
 from typing import Dict
 
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from langchain_core.documents import Document
 
@@ -14,6 +16,12 @@ router = APIRouter()
 
 _reader = VectorStoreReader()
 _chat_flow = ChatService(_reader)
+_STREAM_END = orjson.dumps({"type": "end"}).decode()
+
+
+async def aclose() -> None:
+    """Release the module-level chat service's clients; called from the app lifespan."""
+    await _chat_flow.aclose()
 
 
 @router.get("/")
@@ -26,7 +34,7 @@ async def ingest_tems(payload: Dict[str, str]):
     url = payload.get("url", "https://newsapi.org/v2/everything?q=bitcoin")
 
     try:
-        res = extract_html(url)
+        res = await asyncio.to_thread(extract_html, url)
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"Failed to extract articles: {e}")
 
@@ -35,7 +43,7 @@ async def ingest_tems(payload: Dict[str, str]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process data via chat flow: {e}")
 
-    items = getattr(docs, "items", None)
+    items = docs.items
     if not items:
         return {
             "success": True,
@@ -44,33 +52,31 @@ async def ingest_tems(payload: Dict[str, str]):
             "parallel": False,
         }
 
-    lc_docs = [
+    stored = len(items)
+    use_parallel = stored > 10
+    lc_docs = (
         Document(
             page_content=item.summary,
             metadata={
-                "source": getattr(item, "source", None),
-                "title": getattr(item, "title", None),
+                "source": item.source,
+                "title": item.title,
             },
         )
         for item in items
-    ]
+    )
 
     try:
-        vs = ensure_vectorstore()
-        use_parallel = len(lc_docs) > 10
-
-        if use_parallel:
-            store_docs_parallel(vs, lc_docs)
-        else:
-            store_docs_serial(vs, lc_docs)
+        vs = await asyncio.to_thread(ensure_vectorstore)
+        store = store_docs_parallel if use_parallel else store_docs_serial
+        await asyncio.to_thread(store, vs, lc_docs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to store documents in vector DB: {e}")
 
     return {
         "success": True,
-        "message": f"Ingestion completed. Stored {len(lc_docs)} document(s).",
-        "stored": len(lc_docs),
-        "parallel": len(lc_docs) > 10,
+        "message": f"Ingestion completed. Stored {stored} document(s).",
+        "stored": stored,
+        "parallel": use_parallel,
     }
 
 
@@ -79,6 +85,8 @@ async def chat_ws(websocket: WebSocket):
     params = websocket.query_params
     incoming_conv_id = params.get("conversation_id")
     incoming_locale = params.get("locale", "en")
+    # stream=1: one {"type": "token"} frame per chunk, then {"type": "end"}
+    stream = params.get("stream") == "1"
     FlowContextManager.init_for_connection(
         conversation_id=incoming_conv_id,
         flow_name="websocket-chat",
@@ -91,8 +99,14 @@ async def chat_ws(websocket: WebSocket):
     try:
         while True:
             text = await websocket.receive_text()
+            if stream:
+                async for chunk in _chat_flow.stream_message(text):
+                    await websocket.send_text(orjson.dumps({"type": "token", "content": chunk}).decode())
+                await websocket.send_text(_STREAM_END)
+                continue
+
             response = await _chat_flow.handle_message(text)
 
-            await websocket.send_json(response)
+            await websocket.send_text(orjson.dumps(response).decode())
     except WebSocketDisconnect:
         pass
@@ -1,25 +1,40 @@
-from typing import Any, List
+import asyncio
+import json
+import re
+from typing import Any, AsyncIterator, List
 
-from langchain_classic.chains.llm import LLMChain
+from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import (
     ChatPromptTemplate,
     HumanMessagePromptTemplate,
     SystemMessagePromptTemplate,
 )
 from langchain_core.prompts.base import BasePromptTemplate
+from langchain_core.prompts.string import get_template_variables
+from app.core.config import settings
 from app.core.context_vars.context_vars import FlowContextManager
 from app.schema.common import NewsList, NewsIntentResponse
+from app.services.intent_cache import SemanticIntentCache
 from app.services.langfuse_client import LangfuseCallbackHandler
 from app.services.llm_helper.llm_helper import LLMHelper
 from app.services.vector_reader.vector_reader import VectorStoreReader
 from app.services.llm_provider import LLMProvider
-from app.services.prompt_manager import get_prompt_template
+from app.services.prompt_manager import aget_prompt_template
 
 BATCH_SIZE = 10
+MAX_CONCURRENT_BATCHES = 8
 NEWS_PROMPT_KEY = "chat_response"
 GENERAL_PROMPT_KEY = "general_response"
 NEWS_INTENT_PROMPT_KEY = "news_intent"
 
+# deterministic intent gate, consulted before the cache and the LLM
+_TRIVIAL_RE = re.compile(r"^\s*(hi|hello|hey|thanks|thank you|ok|okay)\b[\s!.,?]*$", re.I)
+_NEWS_RE = re.compile(r"\b(news|headlines?|breaking|latest|today'?s|happening|updates?)\b", re.I)
+FAST_PATH_MAX_CHARS = 200
+
+# built prompt templates are shared across turns and must not be mutated
+_PROMPT_TEMPLATE_CACHE: dict[tuple[str, int], BasePromptTemplate] = {}
+
 
 def chunk_list(items: List[Any], size: int) -> List[List[Any]]:
     return [items[i:i + size] for i in range(0, len(items), size)]
@@ -28,130 +43,215 @@ def chunk_list(items: List[Any], size: int) -> List[List[Any]]:
 class ChatService(LLMHelper):
     def __init__(self, reader: VectorStoreReader):
         self.reader = reader
-        self.llm = LLMProvider.get()
+        self.intent_cache = SemanticIntentCache() if settings.SEMANTIC_INTENT_CACHE else None
         self.prompt_name = None
-        self.msg_id = FlowContextManager.get_user_message_id()
-        self.conv_id = FlowContextManager.get_user_message_id()
         self.output_model = None
+        self.langfuse_handler = LangfuseCallbackHandler.get()
+        self._background_tasks: set[asyncio.Task] = set()
+
+    # resolved per call: the provider rebuilds its models after LLMProvider.aclose()
+    @property
+    def llm(self):
+        return LLMProvider.get()
+
+    @property
+    def intent_llm(self):
+        return LLMProvider.get_deterministic()
+
+    async def aclose(self) -> None:
+        """Release the reader's and intent cache's Qdrant clients; called on app shutdown."""
+        await self.reader.aclose()
+        if self.intent_cache is not None:
+            await self.intent_cache.aclose()
 
     async def handle_message(self, user_text: str) -> str:
+        prompt, input_payload, config = await self._prepare_turn(user_text)
+
+        result = await self.safe_ainvoke(
+            prompt=prompt,
+            llm=self.llm,
+            callback=[self.langfuse_handler],
+            input_dict=input_payload,
+            output_model=self.output_model,
+            config=config,
+        )
+        return result
+
+    async def stream_message(self, user_text: str) -> AsyncIterator[str]:
+        """
+        Streaming twin of `handle_message`: yields response tokens as the LLM
+        produces them instead of waiting for the full answer.
+        """
+        prompt, input_payload, config = await self._prepare_turn(user_text)
+
+        chain = prompt | self.llm | StrOutputParser()
+        stream_config = {**config, "callbacks": [self.langfuse_handler]}
+        async with LLMProvider.sem():
+            async for chunk in chain.astream(input_payload, config=stream_config):
+                yield chunk
+
+    async def _prepare_turn(self, user_text: str):
         FlowContextManager.init_for_message()
 
-        is_news = await self._detect_news_intent(user_text)
-        prompt_key = NEWS_PROMPT_KEY if is_news else GENERAL_PROMPT_KEY
-        prompt = self._load_prompt(prompt_key)
-        input_payload = {"question": user_text}
+        # retrieve speculatively while the intent is classified; dropped for general chat
+        retrieval = asyncio.create_task(self.reader.aretrieve(user_text))
+        try:
+            is_news = await self._detect_news_intent(user_text)
+        except BaseException:
+            self._discard_task(retrieval)
+            raise
 
+        input_payload = {"question": user_text}
         if is_news:
-            docs = self.reader.retrieve(user_text)
+            docs = await retrieval
             context = " ".join(d.page_content for d in docs) if docs else "No context."
             input_payload["context"] = context
+        else:
+            self._discard_task(retrieval)
+
+        prompt_key = NEWS_PROMPT_KEY if is_news else GENERAL_PROMPT_KEY
+        prompt = await self._load_prompt(prompt_key)
 
         self.prompt_name = prompt_key
 
-        handler = LangfuseCallbackHandler(
-            session_id=str(self.conv_id),
-            trace_name=self.prompt_name or "chat",
-            metadata={"user_message_id": str(self.msg_id), "prompt_key": prompt_key},
-        )
-        chain = (
-            LLMChain(
-                name=self.prompt_name,
-                llm=self.llm,
-                prompt=prompt,
-                callbacks=[handler],
-            )
-            .with_config(
-                {
-                    "langfuse_session_id": str(self.conv_id),
-                    "metadata": {"user_message_id": str(self.msg_id), "prompt_key": prompt_key},
-                }
-            )
-        )
-
-        result = await self.safe_ainvoke(
-            chain=chain,
-            callback=[handler],
-            input_dict=input_payload,
-            output_model=self.output_model,
-        )
-        return result
+        config = self._trace_config(self.prompt_name, prompt_key=prompt_key)
+        return prompt, input_payload, config
 
     async def generate_news_summaries(self, data) -> NewsList:
         """
-        Takes a NewsAPI-like payload:
+        Takes either the page HTML returned by `extract_html`, or a NewsAPI-like payload:
         {
             "status": "ok",
             "totalResults": ...,
             "articles": [ ... ]
         }
-        Injects list of articles into prompt, asks LLM to produce:
+        Article lists are split into BATCH_SIZE chunks that are summarized
+        concurrently; HTML is sent as a single prompt. Each prompt asks the LLM to produce:
             NewsList(items=[NewsItem(...), ...])
-        and returns that Pydantic model.
+        and the items of all batches are merged into one Pydantic model.
         """
 
         prompt_key = "news_summary"
-        prompt = self._load_prompt(prompt_key)
+        prompt = await self._load_prompt(prompt_key)
         self.prompt_name = prompt_key
-        handler = LangfuseCallbackHandler(
-            session_id=str(self.conv_id),
-            trace_name=self.prompt_name or "chat",
-            metadata={"user_message_id": str(self.msg_id), "prompt_key": prompt_key},
-        )
+        config = self._trace_config(self.prompt_name, prompt_key=prompt_key)
 
-        chain = LLMChain(prompt=prompt, llm=self.llm, name=self.prompt_name, callbacks=[handler])
+        if isinstance(data, dict):
+            data = data.get("articles") or []
+        if not isinstance(data, list):
+            batches = [data]
+        else:
+            batches = [
+                json.dumps(chunk, ensure_ascii=False, default=str)
+                for chunk in chunk_list(data, BATCH_SIZE)
+            ]
+        if len(batches) == 1:
+            return await self._summarize_batch(prompt, config, batches[0])
 
-        result = await self.safe_ainvoke(
-            chain=chain,
-            callback=[handler],
-            input_dict={"articles": data},
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+
+        async def summarize(batch: str) -> NewsList:
+            async with semaphore:
+                return await self._summarize_batch(prompt, config, batch)
+
+        results = await asyncio.gather(*(summarize(batch) for batch in batches))
+        return NewsList(items=[item for result in results for item in result.items])
+
+    async def _summarize_batch(self, prompt, config, articles) -> NewsList:
+        return await self.safe_ainvoke(
+            prompt=prompt,
+            llm=LLMProvider.get_summarizer(),
+            callback=[self.langfuse_handler],
+            input_dict={"articles": articles},
             output_model=NewsList,
+            config=config,
         )
 
-        return result
-
     async def _detect_news_intent(self, user_text: str) -> bool:
-        prompt = self._load_prompt(NEWS_INTENT_PROMPT_KEY)
-        handler = LangfuseCallbackHandler(
-            session_id=str(self.conv_id),
-            trace_name=NEWS_INTENT_PROMPT_KEY,
-            metadata={"user_message_id": str(self.msg_id), "classification": True},
-        )
-        chain = (
-            LLMChain(
-                name=NEWS_INTENT_PROMPT_KEY,
-                llm=self.llm,
-
-                prompt=prompt,
-                callbacks=[handler],
-            )
-            .with_config(
-                {
-                    "langfuse_session_id": str(self.conv_id),
-                    "metadata": {"user_message_id": str(self.msg_id), "classification": True},
-                }
-            )
-        )
+        if settings.INTENT_FAST_PATH:
+            fast = self._fast_news_intent(user_text)
+            if fast is not None:
+                return fast
 
+        vector = None
+        if self.intent_cache is not None:
+            vector = await self.reader.embed_query(user_text)
+            cached = await self.intent_cache.lookup(vector)
+            if cached is not None:
+                return cached
+
+        prompt = await self._load_prompt(NEWS_INTENT_PROMPT_KEY)
         response = await self.safe_ainvoke(
-            chain=chain,
-            callback=[handler],
+            prompt=prompt,
+            llm=self.intent_llm,
+            callback=[self.langfuse_handler],
             output_model=NewsIntentResponse,
             input_dict={"question": user_text},
+            config=self._trace_config(NEWS_INTENT_PROMPT_KEY, classification=True),
         )
 
-        return bool(getattr(response, "is_news", False))
+        is_news = bool(getattr(response, "is_news", False))
+        if vector is not None:
+            # off the reply path: the upsert result is never needed by this turn
+            self._run_in_background(self.intent_cache.store(vector, is_news))
+        return is_news
+
+    @staticmethod
+    def _fast_news_intent(user_text: str) -> bool | None:
+        """Classify obvious messages without the LLM; None means ambiguous."""
+        if _TRIVIAL_RE.match(user_text):
+            return False
+        if len(user_text) < FAST_PATH_MAX_CHARS and _NEWS_RE.search(user_text):
+            return True
+        return None
+
+    def _trace_config(self, trace_name: str, **metadata: Any) -> dict:
+        """
+        Runnable config carrying the Langfuse trace context for the shared handler.
+
+        Ids come from the context vars set by `init_for_message`: this service is
+        shared by all connections, so per-message state can't live on `self`.
+        """
+        message = FlowContextManager.get_message_context()
+        return {
+            "run_name": trace_name,
+            "metadata": {
+                "langfuse_session_id": FlowContextManager.get_conversation_id(),
+                "langfuse_trace_id": message.trace_id,
+                "langfuse_trace_name": trace_name,
+                "user_message_id": message.user_message_id,
+                **metadata,
+            },
+        }
+
+    def _run_in_background(self, coro) -> None:
+        """Fire-and-forget a coroutine; the task is referenced until done and its error consumed."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
 
     @staticmethod
-    def _load_prompt(prompt_key: str, *, prefer_langfuse: bool = True) -> BasePromptTemplate:
-        template = get_prompt_template(prompt_key, prefer_langfuse=prefer_langfuse)
+    def _discard_task(task: asyncio.Task) -> None:
+        """Cancel a speculative task without surfacing its result or error."""
+        task.cancel()
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    @staticmethod
+    async def _load_prompt(prompt_key: str, *, prefer_langfuse: bool = True) -> BasePromptTemplate:
+        template = await aget_prompt_template(prompt_key, prefer_langfuse=prefer_langfuse)
         if isinstance(template, BasePromptTemplate):
             return template
         if isinstance(template, str):
-            structured = ChatService._build_chat_prompt_from_string(template)
-            if structured:
-                return structured
-            return ChatPromptTemplate.from_template(template)
+            # keyed on the text too, so YAML edits and new Langfuse versions rebuild
+            cache_key = (prompt_key, hash(template))
+            cached = _PROMPT_TEMPLATE_CACHE.get(cache_key)
+            if cached is None:
+                cached = ChatService._build_chat_prompt_from_string(template)
+                if cached is None:
+                    cached = ChatPromptTemplate.from_template(template)
+                _PROMPT_TEMPLATE_CACHE[cache_key] = cached
+            return cached
         msg = f"Unsupported prompt template type for key '{prompt_key}': {type(template)}"
         raise TypeError(msg)
 
@@ -161,14 +261,17 @@ class ChatService(LLMHelper):
         if not stripped:
             return None
 
+        # static lines form the system block so it is a stable, cacheable prefix;
+        # every line with a placeholder goes to the human block, order preserved
         system_lines: List[str] = []
         human_lines: List[str] = []
-        current_target = system_lines
 
         for line in stripped.splitlines():
-            if "{" in line and "}" in line:
-                current_target = human_lines
-            current_target.append(line)
+            # escaped braces ({{ / }}) are literal text, not placeholders
+            if get_template_variables(line, "f-string"):
+                human_lines.append(line)
+            else:
+                system_lines.append(line)
 
         system_text = "\n".join(system_lines).strip()
         human_text = "\n".join(human_lines).strip()
@@ -176,9 +279,14 @@ class ChatService(LLMHelper):
         if not system_text or not human_text:
             return None
 
+        system_message = SystemMessagePromptTemplate.from_template(system_text)
+        if system_message.input_variables:
+            msg = f"System block must be static, found placeholders: {system_message.input_variables}"
+            raise ValueError(msg)
+
         return ChatPromptTemplate.from_messages(
             [
-                SystemMessagePromptTemplate.from_template(system_text),
+                system_message,
                 HumanMessagePromptTemplate.from_template(human_text),
             ]
         )
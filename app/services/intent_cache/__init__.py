@@ -0,0 +1 @@
+from .intent_cache import SemanticIntentCache
\ No newline at end of file
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import uuid
+from typing import List, Optional
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+from app.core.config import settings
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SemanticIntentCache:
+    """
+    Qdrant-backed cache of news-intent labels keyed by query embedding.
+
+    - Lazily connects and creates its collection on first use
+    - A hit is the nearest stored query above the cosine threshold
+    - Never raises: cache errors are logged and treated as a miss
+    """
+
+    def __init__(self) -> None:
+        self.collection_name = settings.SEMANTIC_INTENT_CACHE_COLLECTION
+        self.threshold = settings.SEMANTIC_INTENT_CACHE_THRESHOLD
+        self.client: Optional[AsyncQdrantClient] = None
+        self._init_lock = asyncio.Lock()
+
+    async def _init(self) -> AsyncQdrantClient:
+        if self.client is not None:
+            return self.client
+
+        # concurrent first lookups must not each open a client and create the collection
+        async with self._init_lock:
+            if self.client is None:
+                self.client = await self._connect()
+        return self.client
+
+    async def aclose(self) -> None:
+        """Close the client; the next lookup reconnects."""
+        client, self.client = self.client, None
+        # a fresh lock too: asyncio primitives bind to the loop that first used them
+        self._init_lock = asyncio.Lock()
+        if client is not None:
+            await client.close()
+
+    async def _connect(self) -> AsyncQdrantClient:
+        client = AsyncQdrantClient(
+            url=settings.QDRANT_URL,
+            prefer_grpc=True,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            timeout=settings.QDRANT_TIMEOUT,
+        )
+        if not await client.collection_exists(self.collection_name):
+            await client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(
+                    size=settings.EMBEDDING_DIM,
+                    distance=Distance.COSINE,
+                ),
+            )
+            LOGGER.info("Created Qdrant collection '%s'", self.collection_name)
+        return client
+
+    async def lookup(self, vector: List[float]) -> Optional[bool]:
+        """Return the cached `is_news` label for a near-identical query, if any."""
+        try:
+            client = await self._init()
+            response = await client.query_points(
+                collection_name=self.collection_name,
+                query=vector,
+                limit=1,
+                score_threshold=self.threshold,
+                with_payload=True,
+            )
+        except Exception as e:
+            LOGGER.warning("Semantic intent cache lookup failed: %s", e)
+            return None
+
+        if not response.points:
+            return None
+        return bool(response.points[0].payload.get("is_news"))
+
+    async def store(self, vector: List[float], is_news: bool) -> None:
+        try:
+            client = await self._init()
+            await client.upsert(
+                collection_name=self.collection_name,
+                points=[PointStruct(id=str(uuid.uuid4()), vector=vector, payload={"is_news": is_news})],
+            )
+        except Exception as e:
+            LOGGER.warning("Semantic intent cache store failed: %s", e)
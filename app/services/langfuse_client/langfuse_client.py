@@ -1,17 +1,28 @@
+import asyncio
+import hashlib
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
+from cachetools import TTLCache
 from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.outputs import LLMResult
 from langfuse import Langfuse
 
 from app.core.config import settings
 
+PROMPT_CACHE_TTL_SECONDS = 60
+TRACE_CACHE_SIZE = 1024
+TRACE_CACHE_TTL_SECONDS = 600
+
 
 class LangfuseClient:
     """Minimal singleton wrapper around the Langfuse SDK."""
 
     _client: Optional[Langfuse] = None
+    _prompt_cache: TTLCache = TTLCache(maxsize=128, ttl=PROMPT_CACHE_TTL_SECONDS)
+    _prompt_lock = threading.Lock()
 
     @classmethod
     def get_client(cls) -> Langfuse:
@@ -26,40 +37,84 @@ class LangfuseClient:
 
     @classmethod
     def get_prompt(cls, prompt_name: str, **kwargs: Any):
+        key = cls._prompt_cache_key(prompt_name, kwargs)
+        with cls._prompt_lock:
+            prompt = cls._prompt_cache.get(key)
+        if prompt is not None:
+            return prompt
+
         logging.debug("Fetching prompt from Langfuse: %s", prompt_name)
-        return cls.get_client().get_prompt(prompt_name, **kwargs)
+        prompt = cls.get_client().get_prompt(prompt_name, **kwargs)
+        with cls._prompt_lock:
+            cls._prompt_cache[key] = prompt
+        return prompt
+
+    @classmethod
+    async def aget_prompt(cls, prompt_name: str, **kwargs: Any):
+        """Like `get_prompt`, but a cache miss is fetched in a worker thread."""
+        key = cls._prompt_cache_key(prompt_name, kwargs)
+        with cls._prompt_lock:
+            prompt = cls._prompt_cache.get(key)
+        if prompt is not None:
+            return prompt
+        return await asyncio.to_thread(cls.get_prompt, prompt_name, **kwargs)
+
+    @staticmethod
+    def _prompt_cache_key(prompt_name: str, kwargs: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (prompt_name, *sorted(kwargs.items()))
+
+
+def _trace_payload(value: Any) -> Any:
+    """
+    Prompts/outputs as sent to Langfuse: unchanged structured data, or a digest
+    when LANGFUSE_TRUNCATE_PROMPTS is set.
+    """
+    if value is None or not settings.LANGFUSE_TRUNCATE_PROMPTS:
+        return value
+    raw = value.encode() if isinstance(value, str) else orjson.dumps(value, default=str)
+    return {"prompt_sha256": hashlib.sha256(raw).hexdigest(), "size": len(raw)}
 
 
 class LangfuseCallbackHandler(BaseCallbackHandler):
     """
-    Simple Langfuse callback handler.
+    Process-wide Langfuse callback handler.
+
+    One instance is shared by every request (see `get()`); the trace context is
+    read from the run metadata instead of the constructor:
 
-    Creates a single trace per run (based on `trace_name` or the first model name)
-    and records an LLM span for each run_id. Chain callbacks are no-ops, keeping
-    the handler focused on LLM usage tracing.
+        langfuse_session_id  -> trace session
+        langfuse_trace_id    -> groups LLM runs of one message into a trace
+        langfuse_trace_name  -> trace name (falls back to the model name)
+
+    Remaining user metadata (no `langfuse_`/`ls_`/`lc_` keys) is attached to
+    the trace. Each run_id gets an LLM span; chain callbacks are no-ops. The
+    Langfuse SDK only enqueues events here, the network I/O happens on its
+    background thread.
     """
 
-    def __init__(
-        self,
-        session_id: Optional[str] = None,
-        trace_name: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None,
-        enabled: bool = True,
-    ) -> None:
+    # callbacks only enqueue SDK events, so run them on the loop instead of
+    # executor threads; the shared trace cache is then never touched concurrently
+    run_inline = True
+
+    _instance: Optional["LangfuseCallbackHandler"] = None
+
+    def __init__(self, enabled: bool = True) -> None:
         super().__init__()
 
         self.enabled = enabled and settings.LANGFUSE_TRACING_ENABLED
-        self.session_id = session_id
-        self.trace_name = trace_name
-        self.metadata = metadata or {}
 
         self.client: Optional[Langfuse] = LangfuseClient.get_client() if self.enabled else None
         if not self.client:
             logging.debug("LangfuseCallbackHandler disabled; no traces will be emitted.")
 
-        self._trace = None
-        self._llm_spans: Dict[str, Any] = {}
+        self._traces: TTLCache = TTLCache(maxsize=TRACE_CACHE_SIZE, ttl=TRACE_CACHE_TTL_SECONDS)
+        self._llm_spans: Dict[Any, Tuple[Any, Any, Dict[str, Any]]] = {}
 
+    @classmethod
+    def get(cls) -> "LangfuseCallbackHandler":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
 
     def on_llm_start(
         self,
@@ -75,6 +130,7 @@ class LangfuseCallbackHandler(BaseCallbackHandler):
         if not self.client:
             return
 
+        metadata = metadata or {}
         model_name = "unknown"
         if serialized:
             model_id = serialized.get("id")
@@ -83,24 +139,34 @@ class LangfuseCallbackHandler(BaseCallbackHandler):
             elif isinstance(model_id, str):
                 model_name = model_id
 
-        trace_title = self.trace_name or model_name or "llm-run"
-        if self._trace is None:
-            self._trace = self.client.trace(
+        trace_title = metadata.get("langfuse_trace_name") or model_name or "llm-run"
+        trace_metadata = {
+            key: value
+            for key, value in metadata.items()
+            if not key.startswith(("langfuse_", "ls_", "lc_"))
+        }
+        trace_key = (metadata.get("langfuse_trace_id") or parent_run_id or run_id, trace_title)
+
+        trace = self._traces.get(trace_key)
+        if trace is None:
+            trace = self.client.trace(
                 name=trace_title,
-                input={"prompts": prompts},
-                metadata=self.metadata,
-                session_id=self.session_id,
+                input=_trace_payload({"prompts": prompts}),
+                metadata=trace_metadata,
+                session_id=metadata.get("langfuse_session_id"),
             )
+            self._traces[trace_key] = trace
 
         span_metadata = {
             "model": model_name,
-            **(metadata or {}),
+            **metadata,
         }
-        self._llm_spans[run_id] = self._trace.span(
+        span = trace.span(
             name=f"llm-{run_id}",
-            input=prompts,
+            input=_trace_payload(prompts),
             metadata=span_metadata,
         )
+        self._llm_spans[run_id] = (span, trace, trace_metadata)
 
     def on_llm_end(
         self,
@@ -113,9 +179,10 @@ class LangfuseCallbackHandler(BaseCallbackHandler):
         if not self.client:
             return
 
-        span = self._llm_spans.pop(run_id, None)
-        if span is None:
+        entry = self._llm_spans.pop(run_id, None)
+        if entry is None:
             return
+        span, trace, _ = entry
 
         outputs: List[str] = []
         if response.generations:
@@ -124,15 +191,14 @@ class LangfuseCallbackHandler(BaseCallbackHandler):
                     outputs.append(getattr(gen, "text", str(gen)))
 
         try:
-            span.end(output=outputs[0] if len(outputs) == 1 else outputs)
+            span.end(output=_trace_payload(outputs[0] if len(outputs) == 1 else outputs))
         except Exception:
             span.end()
 
-        if self._trace:
-            try:
-                self._trace.update(output=outputs[0] if outputs else None)
-            except Exception:
-                pass
+        try:
+            trace.update(output=_trace_payload(outputs[0] if outputs else None))
+        except Exception:
+            pass
 
     def on_llm_error(
         self,
@@ -145,20 +211,20 @@ class LangfuseCallbackHandler(BaseCallbackHandler):
         if not self.client:
             return
 
-        span = self._llm_spans.pop(run_id, None)
-        if span is None:
+        entry = self._llm_spans.pop(run_id, None)
+        if entry is None:
             return
+        span, trace, trace_metadata = entry
 
         try:
             span.end(level="ERROR", status_message=str(error))
         except Exception:
             span.end()
 
-        if self._trace:
-            try:
-                self._trace.update(metadata={**self.metadata, "error": str(error)})
-            except Exception:
-                pass
+        try:
+            trace.update(metadata={**trace_metadata, "error": str(error)})
+        except Exception:
+            pass
 
     def flush(self) -> None:
         if self.client and hasattr(self.client, "flush"):
@@ -1,69 +1,97 @@
-from typing import Any, Type, Callable
+from functools import lru_cache
+from typing import Any
 import logging
 
-from langchain_core.output_parsers import PydanticOutputParser
+import orjson
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate, SystemMessagePromptTemplate
-from langchain_core.runnables import RunnableBinding
+from langchain_core.prompts.base import BasePromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langchain_core.exceptions import OutputParserException
 from json_repair import repair_json
 
-from app.helpers.pydantic import _ensure_llm_and_extra_body, to_strict_json_schema
-from app.services.prompt_manager import get_prompt_template
+from app.helpers.pydantic import to_strict_json_schema
+from app.services.llm_provider import LLMProvider
+from app.services.prompt_manager import aget_prompt_template
 
 MAX_ATTEMPTS_LLM = 2
 LOGGER = logging.getLogger(__name__)
 LLM_RETRY_PROMPT_KEY = "llm_retry"
 
+# output models are constant classes, so their schema/parser are built once
+_SCHEMA_CACHE: dict[type, tuple[dict, dict, PydanticOutputParser]] = {}
+
+
+def _structured_output(output_model: type) -> tuple[dict, dict, PydanticOutputParser]:
+    """Return (strict JSON schema, OpenAI response_format, parser) for an output model."""
+    cached = _SCHEMA_CACHE.get(output_model)
+    if cached is None:
+        schema = to_strict_json_schema(output_model)
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": schema["title"],
+                "strict": True,
+                "schema": schema,
+            },
+        }
+        cached = _SCHEMA_CACHE.setdefault(
+            output_model,
+            (schema, response_format, PydanticOutputParser(pydantic_object=output_model)),
+        )
+    return cached
+
+
+@lru_cache(maxsize=8)
+def _retry_template(template: str) -> PromptTemplate:
+    """Parse the llm_retry template once per distinct text."""
+    return PromptTemplate.from_template(template)
+
 
 class LLMHelper:
     async def safe_ainvoke(
             self,
-            chain,
+            prompt: BasePromptTemplate,
+            llm: BaseChatModel,
             callback,
             input_dict: dict,
             output_model,
+            config: RunnableConfig | None = None,
             **kwargs: dict[str, Any],
     ):
         """
         Single-mode version: always uses OpenAI JSON schema when output_model is provided.
         If output_model is None -> return plain text.
+
+        Runs `prompt | llm | StrOutputParser()` as an LCEL pipeline; the JSON schema
+        is bound to the llm per call instead of being written onto the shared model.
         """
         attempt = 0
         response_text = ""
         parser: PydanticOutputParser | None = None
+        config = config or {}
+        run_name = config.get("run_name") or getattr(prompt, "name", None) or "llm"
+        base_prompt = prompt
 
-        while attempt <= MAX_ATTEMPTS_LLM:
-            extra_body = None
-            previous_response_format = None
-            try:
-                if output_model is not None:
-                    _, extra_body = _ensure_llm_and_extra_body(chain)
-
-                    output_model_dict = to_strict_json_schema(output_model)
-
-                    response_format = {
-                        "type": "json_schema",
-                        "json_schema": {
-                            "name": output_model_dict["title"],
-                            "strict": True,
-                            "schema": output_model_dict,
-                        },
-                    }
+        if output_model is not None:
+            output_model_dict, response_format, parser = _structured_output(output_model)
+            llm = llm.bind(response_format=response_format)
 
+            input_dict.setdefault("format_instructions", output_model_dict)
 
-                    previous_response_format = extra_body.get("response_format")
-                    extra_body["response_format"] = response_format
-
-                    parser = PydanticOutputParser(pydantic_object=output_model)
-
-                    input_dict.setdefault("format_instructions", output_model_dict)
-
-                LOGGER.debug(
-                    "Invoking LLM chain attempt=%d model=%s", attempt + 1, getattr(chain, "llm", None)
-                )
-                response = await chain.ainvoke(input=input_dict, **kwargs, config={"callbacks": callback})
+        while attempt <= MAX_ATTEMPTS_LLM:
+            try:
+                chain = prompt | llm | StrOutputParser()
+                attempt_config: RunnableConfig = {
+                    **config,
+                    "callbacks": callback,
+                    "run_name": run_name if attempt == 0 else f"{run_name} - Retry {attempt}",
+                }
 
-                response_text = response["text"]
+                LOGGER.debug("Invoking LLM chain attempt=%d run=%s", attempt + 1, run_name)
+                async with LLMProvider.sem():
+                    response_text = await chain.ainvoke(input_dict, config=attempt_config, **kwargs)
 
                 if not response_text:
                     raise OutputParserException("Empty response from LLM")
@@ -83,12 +111,11 @@ class LLMHelper:
                     raise
 
                 try:
-                    await self.__append_llm_retry_prompt(
-                        chain,
+                    prompt = await self.__append_llm_retry_prompt(
+                        base_prompt,
                         response_text,
                         str(e),
                         input_dict.get("format_instructions", ""),
-                        attempt,
                     )
                 except Exception as _e:
                     LOGGER.error("safe_ainvoke: error appending retry prompt: %s", _e)
@@ -97,15 +124,16 @@ class LLMHelper:
             except Exception as e:
                 LOGGER.exception("safe_ainvoke: Error invoking LLM")
                 raise
-            finally:
-                if extra_body is not None:
-                    if previous_response_format is None:
-                        extra_body.pop("response_format", None)
-                    else:
-                        extra_body["response_format"] = previous_response_format
 
     @classmethod
     def validate_and_fix_json(cls, response: str):
+        # strict-schema responses are valid JSON in the common case; repair is the slow path
+        try:
+            orjson.loads(response)
+            return response
+        except orjson.JSONDecodeError:
+            pass
+
         invalid_json = '""'
         repair_attempt = repair_json(response, ensure_ascii=False).strip()
         return (
@@ -114,42 +142,38 @@ class LLMHelper:
             else response
         )
 
-
-
     async def __append_llm_retry_prompt(
             self,
-            chain,
+            prompt: BasePromptTemplate,
             response: str,
             error_message: str,
             format_instructions: str,
-            attempt: int,
-    ) -> None:
-        """Add llm_retry as a system message to given chain."""
-        prompt_template = get_prompt_template(LLM_RETRY_PROMPT_KEY)
+    ) -> BasePromptTemplate:
+        """
+        Return a new prompt with llm_retry added as a system message; the given
+        prompt is never modified, since it may be a shared cached template.
+        """
+        retry_template = _retry_template(await aget_prompt_template(LLM_RETRY_PROMPT_KEY))
 
         error_message = error_message.replace(response, "")
-        llm_retry = SystemMessagePromptTemplate.from_template(
-            prompt_template,
-            partial_variables={
-                "previous_response": response,
-                "error_message": error_message,
-                "format_instructions": format_instructions,
-            },
+        llm_retry = SystemMessagePromptTemplate(
+            prompt=retry_template.partial(
+                previous_response=response,
+                error_message=error_message,
+                format_instructions=format_instructions,
+            ),
         )
 
-        if isinstance(chain, RunnableBinding):
-            chain.bound.name = f"{chain.bound.name} - Retry {attempt}"
-            if isinstance(chain.prompt, ChatPromptTemplate):
-                chain.prompt.messages.insert(-1, llm_retry)
-            elif isinstance(chain.prompt, PromptTemplate):
-                chain.prompt = ChatPromptTemplate(
-                    messages=[
-                        SystemMessagePromptTemplate.from_template(
-                            chain.prompt.template
-                        ),
-                        llm_retry,
-                    ],
-                )
-        else:
-            msg = f"Unknown chain type {type(chain)}"
-            raise ValueError(msg)
+        if isinstance(prompt, ChatPromptTemplate):
+            # before the human turn, so the original system prefix stays unchanged
+            return ChatPromptTemplate.from_messages([*prompt.messages[:-1], llm_retry, prompt.messages[-1]])
+        if isinstance(prompt, PromptTemplate):
+            return ChatPromptTemplate.from_messages(
+                [
+                    SystemMessagePromptTemplate.from_template(prompt.template),
+                    llm_retry,
+                ],
+            )
+
+        msg = f"Unknown prompt type {type(prompt)}"
+        raise ValueError(msg)
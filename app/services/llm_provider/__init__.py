@@ -1 +1 @@
-from .llm_provider import LLMProvider
\ No newline at end of file
+from .llm_provider import EmbeddingsProvider, LLMProvider
\ No newline at end of file
@@ -1,9 +1,31 @@
-from langchain_openai import ChatOpenAI
+import asyncio
+import logging
+
+import httpx
+from langchain_core.caches import BaseCache, InMemoryCache
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from app.core.config import settings
 
+LOGGER = logging.getLogger(__name__)
+
+LLM_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=64, max_connections=128, keepalive_expiry=60)
+LLM_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+# the OpenAI SDK retries 429/5xx with exponential backoff
+LLM_MAX_RETRIES = 4
+LLM_REQUEST_TIMEOUT = 30
+# summarising a whole page is slow; fewer, longer attempts instead
+SUMMARY_MAX_RETRIES = 1
+# entries in the in-memory response cache of the deterministic model
+LLM_CACHE_MAX_ENTRIES = 1024
+
 
 class LLMProvider:
     _llm_instance: ChatOpenAI | None = None
+    _deterministic_llm_instance: ChatOpenAI | None = None
+    _summary_llm_instance: ChatOpenAI | None = None
+    _http_client: httpx.Client | None = None
+    _http_async_client: httpx.AsyncClient | None = None
+    _semaphore: asyncio.Semaphore | None = None
 
     @classmethod
     def get(cls) -> ChatOpenAI:
@@ -12,5 +34,127 @@ class LLMProvider:
                 model=settings.LLM_MODEL,
                 temperature=settings.LLM_TEMPERATURE,
                 api_key=settings.OPENAI_API_KEY,
+                max_retries=LLM_MAX_RETRIES,
+                timeout=LLM_REQUEST_TIMEOUT,
+                **cls._http_clients(),
+            )
+        return cls._llm_instance
+
+    @classmethod
+    def get_deterministic(cls) -> ChatOpenAI:
+        """
+        Temperature-0 model for classification calls. It is the only model with a
+        response cache, since only its answers are stable for a given prompt.
+        """
+        if cls._deterministic_llm_instance is None:
+            cls._deterministic_llm_instance = ChatOpenAI(
+                model=settings.LLM_MODEL,
+                temperature=0,
+                cache=cls._build_cache(),
+                api_key=settings.OPENAI_API_KEY,
+                max_retries=LLM_MAX_RETRIES,
+                timeout=LLM_REQUEST_TIMEOUT,
+                **cls._http_clients(),
+            )
+        return cls._deterministic_llm_instance
+
+    @classmethod
+    def get_summarizer(cls) -> ChatOpenAI:
+        """Model for news summarisation, with LLM_SUMMARY_TIMEOUT instead of the chat budget."""
+        if cls._summary_llm_instance is None:
+            cls._summary_llm_instance = ChatOpenAI(
+                model=settings.LLM_MODEL,
+                temperature=settings.LLM_TEMPERATURE,
+                api_key=settings.OPENAI_API_KEY,
+                max_retries=SUMMARY_MAX_RETRIES,
+                timeout=settings.LLM_SUMMARY_TIMEOUT,
+                **cls._http_clients(),
             )
-        return cls._llm_instance
\ No newline at end of file
+        return cls._summary_llm_instance
+
+    @classmethod
+    def sem(cls) -> asyncio.Semaphore:
+        """Process-wide bound on in-flight LLM calls (LLM_MAX_CONCURRENCY)."""
+        if cls._semaphore is None:
+            cls._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        return cls._semaphore
+
+    @classmethod
+    def _http_clients(cls) -> dict:
+        """Keep-alive HTTP/2 pools shared by every ChatOpenAI instance."""
+        if cls._http_async_client is None:
+            cls._http_client = httpx.Client(http2=True, limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT)
+            cls._http_async_client = httpx.AsyncClient(
+                http2=True, limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT
+            )
+        return {"http_client": cls._http_client, "http_async_client": cls._http_async_client}
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared HTTP pools; called from the app lifespan on shutdown."""
+        if cls._http_async_client is not None:
+            await cls._http_async_client.aclose()
+        if cls._http_client is not None:
+            cls._http_client.close()
+        cls._http_client = None
+        cls._http_async_client = None
+        cls._llm_instance = None
+        cls._deterministic_llm_instance = None
+        cls._summary_llm_instance = None
+        cls._semaphore = None
+
+    @staticmethod
+    def _build_cache() -> BaseCache:
+        """Response cache for the deterministic model (Redis when configured, else in-memory)."""
+        if settings.REDIS_URL:
+            import redis
+            from langchain_community.cache import RedisCache
+
+            LOGGER.info("LLM response cache: Redis")
+            return RedisCache(redis.Redis.from_url(settings.REDIS_URL))
+
+        LOGGER.info("LLM response cache: in-memory (max %d entries)", LLM_CACHE_MAX_ENTRIES)
+        return InMemoryCache(maxsize=LLM_CACHE_MAX_ENTRIES)
+
+
+class EmbeddingsProvider:
+    """
+    Process-wide OpenAIEmbeddings with pooled HTTP/2 clients: the sync client
+    serves ingestion (INGEST_HTTP_TIMEOUT), the async one the chat hot path.
+    """
+
+    _embeddings_instance: OpenAIEmbeddings | None = None
+    _http_client: httpx.Client | None = None
+    _http_async_client: httpx.AsyncClient | None = None
+
+    @classmethod
+    def get(cls) -> OpenAIEmbeddings:
+        if cls._embeddings_instance is None:
+            limits = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            cls._http_client = httpx.Client(
+                http2=True,
+                limits=limits,
+                timeout=settings.INGEST_HTTP_TIMEOUT,
+            )
+            cls._http_async_client = httpx.AsyncClient(
+                http2=True,
+                limits=limits,
+                timeout=LLM_HTTP_TIMEOUT,
+            )
+            cls._embeddings_instance = OpenAIEmbeddings(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=cls._http_client,
+                http_async_client=cls._http_async_client,
+            )
+        return cls._embeddings_instance
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the pooled HTTP clients; called from the app lifespan on shutdown."""
+        if cls._http_async_client is not None:
+            await cls._http_async_client.aclose()
+        if cls._http_client is not None:
+            cls._http_client.close()
+        cls._http_client = None
+        cls._http_async_client = None
+        cls._embeddings_instance = None
@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import yaml
 
@@ -10,18 +10,31 @@ LOGGER = logging.getLogger(__name__)
 
 _PROMPT_FILE = Path(__file__).resolve().parents[1] / "prompts" / "prompts.yaml"
 
+# libyaml-backed loader when available; same safe semantics as yaml.safe_load
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_prompt_cache: Dict[str, Any] = {"mtime": None, "data": None}
+
 
 class PromptNotFoundError(KeyError):
     """Raised when a requested prompt key is missing from configuration."""
 
 
 def _load_prompt_definitions() -> Dict[str, Dict[str, str]]:
-    if not _PROMPT_FILE.exists():
-        raise FileNotFoundError(f"Prompt file not found at {_PROMPT_FILE}")
+    """Parse prompts.yaml once and re-read it only when its mtime changes."""
+    try:
+        mtime = _PROMPT_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Prompt file not found at {_PROMPT_FILE}") from None
+
+    if _prompt_cache["mtime"] == mtime:
+        return _prompt_cache["data"]
 
     with _PROMPT_FILE.open("r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle) or {}
+        data = yaml.load(handle, Loader=_YamlLoader) or {}
 
+    _prompt_cache["mtime"] = mtime
+    _prompt_cache["data"] = data
+    LOGGER.debug("Loaded prompt definitions from %s", _PROMPT_FILE)
     return data
 
 
@@ -34,19 +47,30 @@ def get_prompt_template(prompt_key: str, *, prefer_langfuse: bool = True) -> str
     the local YAML template is returned as a fallback.
     """
 
-    prompts = _load_prompt_definitions()
-    config: Optional[Dict[str, str]] = prompts.get(prompt_key)
+    template, langfuse_name = _resolve_prompt_config(prompt_key)
+    if prefer_langfuse and langfuse_name:
+        try:
+            LOGGER.debug(
+                "Fetching Langfuse prompt '%s' for key '%s'",
+                langfuse_name,
+                prompt_key,
+            )
+            template = LangfuseClient.get_prompt(langfuse_name).get_langchain_prompt()
+        except Exception as exc:  # pragma: no cover - defensive against SDK errors
+            _log_langfuse_fallback(langfuse_name, exc)
 
-    if config is None:
-        LOGGER.error("Prompt '%s' not defined in %s", prompt_key, _PROMPT_FILE)
-        raise PromptNotFoundError(f"Prompt '{prompt_key}' not defined in {_PROMPT_FILE}")
+    return template
 
-    template = config.get("template")
-    if template is None:
-        LOGGER.error("Prompt '%s' is missing a fallback template", prompt_key)
-        raise ValueError(f"Prompt '{prompt_key}' does not define a 'template' value")
 
-    langfuse_name = config.get("langfuse_prompt")
+async def aget_prompt_template(prompt_key: str, *, prefer_langfuse: bool = True) -> str:
+    """
+    Async variant of `get_prompt_template`.
+
+    A Langfuse cache miss is fetched in a worker thread so the event loop is never
+    blocked on the prompt API.
+    """
+
+    template, langfuse_name = _resolve_prompt_config(prompt_key)
     if prefer_langfuse and langfuse_name:
         try:
             LOGGER.debug(
@@ -54,18 +78,39 @@ def get_prompt_template(prompt_key: str, *, prefer_langfuse: bool = True) -> str
                 langfuse_name,
                 prompt_key,
             )
-            prompt_client = LangfuseClient.get_client().get_prompt(langfuse_name)
+            prompt_client = await LangfuseClient.aget_prompt(langfuse_name)
             template = prompt_client.get_langchain_prompt()
         except Exception as exc:  # pragma: no cover - defensive against SDK errors
-            LOGGER.warning(
-                "Failed to fetch Langfuse prompt '%s': %s. Falling back to YAML template.",
-                langfuse_name,
-                exc,
-            )
+            _log_langfuse_fallback(langfuse_name, exc)
 
     return template
 
 
+def _resolve_prompt_config(prompt_key: str) -> Tuple[str, Optional[str]]:
+    """Return the YAML fallback template and the Langfuse prompt name for a key."""
+    prompts = _load_prompt_definitions()
+    config: Optional[Dict[str, str]] = prompts.get(prompt_key)
+
+    if config is None:
+        LOGGER.error("Prompt '%s' not defined in %s", prompt_key, _PROMPT_FILE)
+        raise PromptNotFoundError(f"Prompt '{prompt_key}' not defined in {_PROMPT_FILE}")
+
+    template = config.get("template")
+    if template is None:
+        LOGGER.error("Prompt '%s' is missing a fallback template", prompt_key)
+        raise ValueError(f"Prompt '{prompt_key}' does not define a 'template' value")
+
+    return template, config.get("langfuse_prompt")
+
+
+def _log_langfuse_fallback(langfuse_name: str, exc: Exception) -> None:
+    LOGGER.warning(
+        "Failed to fetch Langfuse prompt '%s': %s. Falling back to YAML template.",
+        langfuse_name,
+        exc,
+    )
+
+
 def list_available_prompts() -> Dict[str, Dict[str, str]]:
     """Expose loaded prompt metadata (useful for diagnostics and debugging)."""
 
@@ -1,16 +1,23 @@
+import asyncio
 import logging
+import threading
 from typing import List, Optional, Dict, Any
 
-from qdrant_client import QdrantClient
+from cachetools import LRUCache
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from langchain_qdrant import QdrantVectorStore
 from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
-from qdrant_client.http.models import VectorParams, Distance
+from langchain_core.vectorstores import VectorStoreRetriever
+from qdrant_client.http.models import Distance, QueryRequest, VectorParams
 
 from app.core.config import settings
+from app.services.llm_provider import EmbeddingsProvider
 
 LOGGER = logging.getLogger(__name__)
 
+EMBED_CACHE_SIZE = 1024
+
 
 class VectorStoreReader:
     """
@@ -25,19 +32,49 @@ class VectorStoreReader:
         self._initialized = False
         self.embeddings: Optional[OpenAIEmbeddings] = None
         self.client: Optional[QdrantClient] = None
+        self.async_client: Optional[AsyncQdrantClient] = None
         self.vectorstore: Optional[QdrantVectorStore] = None
-        self.retriever = None
+        self._retrievers: Dict[int, VectorStoreRetriever] = {}
+        self._embed_cache: LRUCache = LRUCache(maxsize=EMBED_CACHE_SIZE)
+        self._init_lock = threading.Lock()
 
     def _init(self) -> None:
         """Connect to Qdrant and prepare collection (runs once)."""
         if self._initialized:
             return
 
+        # _init runs in worker threads; concurrent first calls must not both connect
+        with self._init_lock:
+            if not self._initialized:
+                self._connect()
+
+    async def aclose(self) -> None:
+        """Close the Qdrant clients and forget cached state; the next call reconnects."""
+        with self._init_lock:
+            client, async_client = self.client, self.async_client
+            self._initialized = False
+            self.embeddings = None
+            self.client = None
+            self.async_client = None
+            self.vectorstore = None
+            self._retrievers.clear()
+            # pending embedding futures belong to the closing event loop
+            self._embed_cache.clear()
+
+        if async_client is not None:
+            await async_client.close()
+        if client is not None:
+            client.close()
+
+    def _connect(self) -> None:
         LOGGER.info("Initializing Qdrant vector store connection to %s", settings.QDRANT_URL)
-        self.embeddings = OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY)
+        self.embeddings = EmbeddingsProvider.get()
 
         self.client = QdrantClient(
             url=settings.QDRANT_URL,
+            prefer_grpc=True,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            timeout=settings.QDRANT_TIMEOUT,
         )
 
         collection_name = settings.QDRANT_COLLECTION
@@ -56,12 +93,18 @@ class VectorStoreReader:
             LOGGER.error("Cannot connect to Qdrant at %s: %s", settings.QDRANT_URL, e)
             raise RuntimeError(f"Cannot connect to Qdrant or create collection: {e}") from e
 
+        self.async_client = AsyncQdrantClient(
+            url=settings.QDRANT_URL,
+            prefer_grpc=True,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            timeout=settings.QDRANT_TIMEOUT,
+        )
+
         self.vectorstore = QdrantVectorStore(
             client=self.client,
             collection_name=collection_name,
             embedding=self.embeddings,
         )
-        self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 4})
 
         self._initialized = True
         LOGGER.info("Vector store initialized (collection=%s)", collection_name)
@@ -73,7 +116,14 @@ class VectorStoreReader:
         """
         self._init()
         LOGGER.debug("Retrieving %d documents using query='%s...'", k, query[:50])
-        return self.vectorstore.as_retriever(search_kwargs={"k": k}).invoke(query)
+        return self._get_retriever(k).invoke(query)
+
+    def _get_retriever(self, k: int) -> VectorStoreRetriever:
+        """Return the retriever for `k`, building it once."""
+        retriever = self._retrievers.get(k)
+        if retriever is None:
+            retriever = self._retrievers[k] = self.vectorstore.as_retriever(search_kwargs={"k": k})
+        return retriever
 
     def similarity_search(self, query: str, k: int = 4) -> List[Document]:
         """
@@ -103,4 +153,77 @@ class VectorStoreReader:
             query,
             k=k,
             filter=metadata_filter,
-        )
\ No newline at end of file
+        )
+
+    async def aretrieve(self, query: str, k: int = 4) -> List[Document]:
+        """
+        Async retriever: embeds the query and searches Qdrant without blocking the loop.
+        """
+        if not self._initialized:
+            await asyncio.to_thread(self._init)
+        LOGGER.debug("Async retrieving %d documents using query='%s...'", k, query[:50])
+        vector = await self.embed_query(query)
+        return await self.asimilarity_search_by_vector(vector, k=k)
+
+    async def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query once: repeated and concurrent calls for the same text share
+        one embeddings request (e.g. the intent cache and retrieval of a turn).
+        Does not need Qdrant, so callers can embed before the store is up.
+        """
+        future = self._embed_cache.get(text)
+        if future is None:
+            future = asyncio.ensure_future(EmbeddingsProvider.get().aembed_query(text))
+            self._embed_cache[text] = future
+            future.add_done_callback(lambda f: self._forget_failed_embedding(text, f))
+        # shielded: cancelling one caller must not cancel the shared request
+        return await asyncio.shield(future)
+
+    def _forget_failed_embedding(self, text: str, future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            self._embed_cache.pop(text, None)
+
+    async def asimilarity_search_by_vector(self, vector: List[float], k: int = 4) -> List[Document]:
+        """
+        Async vector similarity search for an already-embedded query.
+        """
+        if not self._initialized:
+            await asyncio.to_thread(self._init)
+        response = await self.async_client.query_points(
+            collection_name=self.vectorstore.collection_name,
+            query=vector,
+            limit=k,
+            with_payload=True,
+        )
+        return self._to_documents(response.points)
+
+    async def asimilarity_search_by_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int = 4,
+    ) -> List[List[Document]]:
+        """
+        Batched variant of `asimilarity_search_by_vector`: one Qdrant round trip
+        for several already-embedded queries.
+        """
+        if not self._initialized:
+            await asyncio.to_thread(self._init)
+        responses = await self.async_client.query_batch_points(
+            collection_name=self.vectorstore.collection_name,
+            requests=[
+                QueryRequest(query=vector, limit=k, with_payload=True)
+                for vector in vectors
+            ],
+        )
+        return [self._to_documents(response.points) for response in responses]
+
+    def _to_documents(self, points) -> List[Document]:
+        return [
+            QdrantVectorStore._document_from_point(
+                point,
+                self.vectorstore.collection_name,
+                self.vectorstore.content_payload_key,
+                self.vectorstore.metadata_payload_key,
+            )
+            for point in points
+        ]
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import sys
+import threading
 import uuid
+import weakref
+from collections import deque
+from itertools import islice
 from pathlib import Path
+from typing import Iterator
 
+import orjson
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
 import websockets
+from websockets.exceptions import ConnectionClosed
 
 ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
@@ -16,50 +23,147 @@ if str(ROOT) not in sys.path:
 
 from app.core.config import settings
 
+WS_RESPONSE_TIMEOUT = 120.0
+# oldest chat turns are dropped past this, keeping memory and rerun cost flat
+MAX_HISTORY_MESSAGES = 200
+RECENT_MESSAGES_RENDERED = 40
+
+
+@st.cache_resource
+def _http_session() -> requests.Session:
+    """
+    One keep-alive session for the whole app process. Streamlit re-executes this
+    script on every rerun, so a plain module global would be rebuilt each time.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
 
 
 def _build_ws_url(conversation_id: str, locale: str) -> str:
-    return f"{settings.WS_URL}/chat/conversation?conversation_id={conversation_id}&locale={locale}"
+    return f"{settings.WS_URL}/chat/conversation?conversation_id={conversation_id}&locale={locale}&stream=1"
 
 
 def _init_state() -> None:
     st.session_state.setdefault("conversation_id", uuid.uuid4().hex)
     st.session_state.setdefault("locale", settings.DEFAULT_LOCALE)
-    st.session_state.setdefault("messages", [])
+    st.session_state.setdefault("messages", deque(maxlen=MAX_HISTORY_MESSAGES))
     st.session_state.setdefault("ingest_url", "")
     st.session_state.setdefault("ingest_result", "")
+    if "_ws_url" not in st.session_state:
+        _refresh_ws_url()
 
 
-async def _ws_send_recv(message: str) -> str:
-    ws_url = _build_ws_url(
+def _refresh_ws_url() -> None:
+    """Rebuild the websocket URL; only needed when the conversation or locale changes."""
+    st.session_state["_ws_url"] = _build_ws_url(
         conversation_id=st.session_state.conversation_id,
         locale=st.session_state.locale,
     )
 
-    ping_interval = getattr(settings, "WS_PING_INTERVAL", 20.0)
-    ping_timeout = getattr(settings, "WS_PING_TIMEOUT", 60.0)
 
-    async with websockets.connect(
-        ws_url,
-        ping_interval=ping_interval,
-        ping_timeout=ping_timeout,
-    ) as ws:
-        await ws.send(message)
-        payload = await ws.recv()
+@st.cache_resource
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """
+    One event loop for every session's websocket, running in a daemon thread,
+    instead of creating and tearing down a loop with asyncio.run per message.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="ws-loop", daemon=True).start()
+    return loop
 
-    try:
-        parsed = json.loads(payload)
-    except json.JSONDecodeError:
-        return str(payload)
-    else:
-        return json.dumps(parsed, indent=2)
 
+def _close_soon(loop: asyncio.AbstractEventLoop, ws) -> None:
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(lambda: loop.create_task(ws.close()))
+
+
+class _WsConnection:
+    """
+    Websocket kept open across Streamlit reruns.
+
+    The connection lives on the shared background event loop, so each chat
+    message only costs its frames instead of a new handshake. Streamlit has no
+    session-end hook; the socket is closed when the session state is dropped.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self._ws = None
+        self._loop = _event_loop()
 
-def _send_via_ws(message: str) -> str:
+    async def _connect(self):
+        return await websockets.connect(
+            self.url,
+            ping_interval=getattr(settings, "WS_PING_INTERVAL", 20.0),
+            ping_timeout=getattr(settings, "WS_PING_TIMEOUT", 60.0),
+        )
+
+    async def _send(self, message: str) -> None:
+        # one reconnect when the server or a proxy dropped the idle connection
+        for attempt in range(2):
+            if self._ws is None:
+                self._ws = await self._connect()
+                weakref.finalize(self, _close_soon, self._loop, self._ws)
+            try:
+                await self._ws.send(message)
+                return
+            except ConnectionClosed:
+                self._ws = None
+                if attempt:
+                    raise
+
+    async def _recv(self):
+        try:
+            return await self._ws.recv()
+        except ConnectionClosed:
+            self._ws = None
+            raise
+
+    async def _reset(self) -> None:
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            await ws.close()
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout=WS_RESPONSE_TIMEOUT)
+
+    def stream(self, message: str) -> Iterator[str]:
+        """Send a message and yield the reply's token frames until the end frame."""
+        self._run(self._send(message))
+        try:
+            while True:
+                event = orjson.loads(self._run(self._recv()))
+                if event.get("type") == "end":
+                    return
+                yield event.get("content", "")
+        except BaseException:
+            # a half-read reply would be picked up by the next message; start clean
+            asyncio.run_coroutine_threadsafe(self._reset(), self._loop)
+            raise
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._reset(), self._loop).result(timeout=5)
+
+
+def _ws_connection() -> _WsConnection:
+    ws_url = st.session_state["_ws_url"]
+    conn = st.session_state.get("_ws_conn")
+    if conn is None or conn.url != ws_url:
+        if conn is not None:
+            conn.close()
+        conn = st.session_state["_ws_conn"] = _WsConnection(ws_url)
+    return conn
+
+
+def _stream_via_ws(message: str) -> Iterator[str]:
     try:
-        return asyncio.run(_ws_send_recv(message))
+        yield from _ws_connection().stream(message)
     except Exception as e:
-        return f"Unexpected websocket error: {e}"
+        yield f"Unexpected websocket error: {e}"
 
 
 def _call_ingest_items(source_url: str) -> str:
@@ -70,11 +174,11 @@ def _call_ingest_items(source_url: str) -> str:
     endpoint = f"{http_base}/chat/ingest-items"
     try:
         timeout = getattr(settings, "INGEST_HTTP_TIMEOUT", 60.0)
-        resp = requests.post(endpoint, json={"url": source_url}, timeout=timeout)
+        resp = _http_session().post(endpoint, json={"url": source_url}, timeout=timeout)
         resp.raise_for_status()
         try:
-            return json.dumps(resp.json(), indent=2)
-        except ValueError:
+            return orjson.dumps(orjson.loads(resp.content), option=orjson.OPT_INDENT_2).decode()
+        except orjson.JSONDecodeError:
             return resp.text
     except requests.RequestException as exc:
         return f"HTTP error calling /ingest-items: {exc}"
@@ -84,7 +188,7 @@ def _render_sidebar() -> None:
     with st.sidebar:
         st.markdown("### Session")
         st.text_input("Conversation ID", value=st.session_state.conversation_id, disabled=True)
-        st.text_input("Locale", key="locale", value=st.session_state.locale)
+        st.text_input("Locale", key="locale", value=st.session_state.locale, on_change=_refresh_ws_url)
 
         st.markdown("---")
         st.markdown("### Ingest source (POST /ingest-items)")
@@ -97,6 +201,22 @@ def _render_sidebar() -> None:
             st.code(st.session_state.ingest_result, language="json")
 
 
+def _render_history() -> None:
+    """
+    Render the newest messages; older ones are only emitted on request, so a
+    rerun doesn't resend and re-parse the whole conversation's markdown.
+    """
+    messages = st.session_state.messages
+    older = len(messages) - RECENT_MESSAGES_RENDERED
+    start = 0
+    if older > 0 and not st.toggle(f"Show {older} older messages", key="show_older_messages"):
+        start = older
+
+    for message in islice(messages, start, None):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+
 def main() -> None:
     st.set_page_config(page_title="AI Assistant", layout="wide")
     _init_state()
@@ -107,10 +227,7 @@ def main() -> None:
 
     st.divider()
 
-    for message in st.session_state.messages:
-        role = message["role"]
-        with st.chat_message(role):
-            st.markdown(message["content"])
+    _render_history()
 
     if prompt := st.chat_input("Type your message"):
         st.session_state.messages.append(
@@ -120,15 +237,13 @@ def main() -> None:
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        response_text = _send_via_ws(prompt)
+        with st.chat_message("assistant"):
+            response_text = st.write_stream(_stream_via_ws(prompt))
 
         st.session_state.messages.append(
             {"role": "assistant", "content": response_text}
         )
 
-        with st.chat_message("assistant"):
-            st.markdown(response_text)
-
 
 if __name__ == "__main__":
     main()
\ No newline at end of file